@@ -13,6 +13,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program. If not, see http://www.gnu.org/licenses/.
 
+import functools
 import importlib.resources
 import string
 from abc import ABC, abstractmethod
@@ -173,6 +174,7 @@ class TemplateWithArithmetic(string.Template):
     idpattern = r"(?a:[_a-z][_a-z0-9]*([+-]1)?)"
 
 
+@functools.lru_cache(maxsize=4096)
 def _template_substitution(
     template: str, num_layers: int, layer_idx: Optional[int] = None
 ) -> str:
@@ -203,59 +205,79 @@ class JsonArchitectureInfo(ArchitectureInfo, BaseModel, frozen=True):
     def _substitute(
         self,
         item: Union[WeightInfo, ProceduralSpaceInfo],
-        config: PretrainedConfig,
+        num_layers: int,
         layer_idx: Optional[int] = None,
     ) -> Union[WeightInfo, ProceduralSpaceInfo]:
-        num_layers = self.num_layers(config)
-
-        obj_dict = item.model_dump(mode="json", exclude_unset=True)
-        for key in obj_dict:
-            if isinstance(obj_dict[key], str):
-                obj_dict[key] = _template_substitution(
-                    obj_dict[key], num_layers, layer_idx
-                )
-            elif isinstance(obj_dict[key], list):
-                obj_dict[key] = [
+        # only rebuild the fields that actually contain templates - the
+        # definitions are already validated, so there is no need to round
+        # trip through model_dump and model_validate
+        update = {}
+        for key in item.model_fields_set:
+            value = getattr(item, key)
+            if isinstance(value, str):
+                new_value = _template_substitution(value, num_layers, layer_idx)
+            elif isinstance(value, list):
+                new_value = [
                     (
                         _template_substitution(s, num_layers, layer_idx)
                         if isinstance(s, str)
                         else s
                     )
-                    for s in obj_dict[key]
+                    for s in value
                 ]
-        return type(item).model_validate(obj_dict)
+            else:
+                continue
+            if new_value != value:
+                update[key] = new_value
+
+        if not update:
+            return item
+        return item.model_copy(update=update)
 
     def name(self) -> str:
         return self.definition.expected_model_type
 
+    @functools.lru_cache(maxsize=4096)
+    def _weights(
+        self, section: str, num_layers: int, layer_idx: Optional[int] = None
+    ) -> Tuple[WeightInfo, ...]:
+        """Return the substituted weights for a section of the definition.
+
+        Cached on the number of layers (and layer index), which are the only
+        parts of the config the templates depend on."""
+        if section == "pre":
+            templates = self.definition.pre_weights
+        elif section == "post":
+            templates = self.definition.post_weights
+        else:
+            templates = self.definition.layer_templates.weights
+        return tuple(
+            self._substitute(wi, num_layers=num_layers, layer_idx=layer_idx)
+            for wi in templates
+        )
+
     def pre_weights(self, config: PretrainedConfig) -> List[WeightInfo]:
-        return [
-            self._substitute(wi, config=config) for wi in self.definition.pre_weights
-        ]
+        return list(self._weights("pre", self.num_layers(config)))
 
     def layer_weights(
         self, index: int, config: PretrainedConfig
     ) -> Optional[List[WeightInfo]]:
-        return [
-            self._substitute(wi, config=config, layer_idx=index)
-            for wi in self.definition.layer_templates.weights
-        ]
+        return list(self._weights("layer", self.num_layers(config), index))
 
     def post_weights(self, config: PretrainedConfig) -> List[WeightInfo]:
-        return [
-            self._substitute(wi, config=config) for wi in self.definition.post_weights
-        ]
+        return list(self._weights("post", self.num_layers(config)))
 
     def sliceable(self) -> bool:
         return True
 
     def procedural_spaces(self, config: PretrainedConfig) -> List[ProceduralSpaceInfo]:
+        num_layers = self.num_layers(config)
         res = []
         for s in self.definition.procedural_spaces or []:
-            res.append(self._substitute(s, config=config))
-        for idx in range(self.num_layers(config)):
+            res.append(self._substitute(s, num_layers=num_layers))
+        for idx in range(num_layers):
             for s in self.definition.layer_templates.procedural_spaces or []:
-                res.append(self._substitute(s, config=config, layer_idx=idx))
+                res.append(self._substitute(s, num_layers=num_layers, layer_idx=idx))
         return res
 
     def has_defined_spaces(self) -> bool:
@@ -276,8 +298,17 @@ class JsonArchitectureInfo(ArchitectureInfo, BaseModel, frozen=True):
     def num_layers_config_key(self) -> str:
         return self.definition.num_layers_config_key
 
+    def __hash__(self) -> int:
+        # the definition contains lists, so hash on its identifying fields
+        return hash(
+            (
+                self.definition.expected_model_type,
+                tuple(self.definition.architectures),
+            )
+        )
+
 
-class MixtralTensorNames(ArchitectureInfo, BaseModel):
+class MixtralTensorNames(ArchitectureInfo, BaseModel, frozen=True):
     ARCHITECTURE_NAME: ClassVar[str] = "MixtralForCausalLM"
     num_local_experts: int
 
@@ -14,6 +14,8 @@
 # along with this program. If not, see http://www.gnu.org/licenses/.
 
 import binascii
+import copy
+import functools
 import logging
 import os
 import os.path
@@ -122,11 +124,8 @@ class ModelReference(BaseModel, frozen=True):
         return ModelReference(model=out_path)
 
     def config(self, trust_remote_code: bool = False) -> PretrainedConfig:
-        return AutoConfig.from_pretrained(
-            self.model.path,
-            revision=self.model.revision,
-            trust_remote_code=trust_remote_code,
-        )
+        # callers are free to modify the returned config, so hand out a copy
+        return copy.deepcopy(_load_config(self.model, trust_remote_code))
 
     def tensor_index(self, cache_dir: Optional[str] = None) -> ShardedTensorIndex:
         assert self.lora is None
@@ -191,6 +190,15 @@ class ModelReference(BaseModel, frozen=True):
         return str(self.model)
 
 
+@functools.lru_cache(maxsize=None)
+def _load_config(model: ModelPath, trust_remote_code: bool) -> PretrainedConfig:
+    return AutoConfig.from_pretrained(
+        model.path,
+        revision=model.revision,
+        trust_remote_code=trust_remote_code,
+    )
+
+
 def dtype_from_name(name: Optional[str]) -> Optional[torch.dtype]:
     if not name:
         return None
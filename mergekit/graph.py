@@ -20,6 +20,7 @@ Classes:
     Executor: Class for scheduling and executing directed acyclic task graphs.
 """
 
+import concurrent.futures
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
 
@@ -119,6 +120,7 @@ class Executor:
         targets (List[Task]): List of target tasks to be executed.
         schedule (List[Task]): Calculated execution schedule of tasks.
         dependencies (Dict[Task, Set[Task]]): Dependencies of each task.
+        prefetch_depth (int): Number of scheduled tasks to look ahead for tasks without dependencies to run in the background.
     """
 
     math_device: torch.device
@@ -126,12 +128,14 @@ class Executor:
     targets: List[Task]
     schedule: List[Task]
     dependencies: Dict[Task, Set[Task]]
+    prefetch_depth: int
 
     def __init__(
         self,
         tasks: List[Task],
         math_device: torch.device = torch.device("cpu"),
         storage_device: torch.device = torch.device("cpu"),
+        prefetch_depth: int = 0,
     ):
         """
         Initializes the Executor with a list of tasks and device configurations.
@@ -140,9 +144,11 @@ class Executor:
             tasks (List[Task]): The list of tasks to be executed.
             math_device (torch.device, optional): The device for tensor computations. Defaults to CPU.
             storage_device (torch.device, optional): The device for storing results. Defaults to CPU.
+            prefetch_depth (int, optional): How far ahead in the schedule to start tasks without dependencies (such as tensor loads) on a background thread. Defaults to 0 (disabled).
         """
         self.math_device = math_device
         self.storage_device = storage_device
+        self.prefetch_depth = prefetch_depth
         self.schedule = self._make_schedule(tasks)
         self.targets = tasks
 
@@ -163,61 +169,76 @@ class Executor:
                 last_use_index[task] = idx
 
         values: Dict[Task, Any] = {}
-        for idx, task in (
-            pbar := tqdm.tqdm(
-                list(enumerate(self.schedule)),
-                disable=quiet,
-                desc="Executing graph",
-            )
-        ):
-            use_math_device = task.uses_accelerator()
-
-            arguments = {}
-            for name, dep in task.arguments().items():
-                value = values[dep]
-
-                # ensure any input tensors are on math device if task asks for it
-                if use_math_device:
-                    if (
-                        isinstance(value, torch.Tensor)
-                        and value.device != self.math_device
-                    ):
-                        value = value.to(self.math_device)
-                    elif isinstance(value, dict):
-                        for key in value:
-                            if (
-                                isinstance(value[key], torch.Tensor)
-                                and value[key].device != self.math_device
-                            ):
-                                value[key] = value[key].to(self.math_device)
-
-                arguments[name] = value
-                del value
-
-            res = task.execute(**arguments)
-            del arguments
-
-            if isinstance(res, torch.Tensor) and res.device != self.storage_device:
-                res = res.to(self.storage_device)
-
-            values[task] = res
-            del res
-
-            if task in self.targets:
-                yield (task, values[task])
-
-            # evict unreferenced values
-            expired = []
-            for key in values:
-                if idx >= last_use_index[key]:
-                    expired.append(key)
-
-            for key in expired:
-                del values[key]
+        # tasks without dependencies (e.g. loading tensors) that have been
+        # started early, so that their I/O overlaps with the current task
+        prefetched: Dict[Task, concurrent.futures.Future] = {}
+        next_prefetch = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as prefetch_pool:
+            for idx, task in (
+                pbar := tqdm.tqdm(
+                    list(enumerate(self.schedule)),
+                    disable=quiet,
+                    desc="Executing graph",
+                )
+            ):
+                while next_prefetch < len(self.schedule) and (
+                    next_prefetch <= idx + self.prefetch_depth
+                ):
+                    upcoming = self.schedule[next_prefetch]
+                    if self.prefetch_depth and not self.dependencies[upcoming]:
+                        prefetched[upcoming] = prefetch_pool.submit(upcoming.execute)
+                    next_prefetch += 1
+
+                if task in prefetched:
+                    res = prefetched.pop(task).result()
+                else:
+                    res = self._execute_task(task, values)
+
+                if isinstance(res, torch.Tensor) and res.device != self.storage_device:
+                    res = res.to(self.storage_device)
+
+                values[task] = res
+                del res
+
+                if task in self.targets:
+                    yield (task, values[task])
+
+                # evict unreferenced values
+                expired = []
+                for key in values:
+                    if idx >= last_use_index[key]:
+                        expired.append(key)
+
+                for key in expired:
+                    del values[key]
 
         del values
         del pbar
 
+    def _execute_task(self, task: Task, values: Dict[Task, Any]) -> Any:
+        use_math_device = task.uses_accelerator()
+
+        arguments = {}
+        for name, dep in task.arguments().items():
+            value = values[dep]
+
+            # ensure any input tensors are on math device if task asks for it
+            if use_math_device:
+                if isinstance(value, torch.Tensor) and value.device != self.math_device:
+                    value = value.to(self.math_device)
+                elif isinstance(value, dict):
+                    for key in value:
+                        if (
+                            isinstance(value[key], torch.Tensor)
+                            and value[key].device != self.math_device
+                        ):
+                            value[key] = value[key].to(self.math_device)
+
+            arguments[name] = value
+            del value
+
+        return task.execute(**arguments)
+
     def execute(self) -> None:
         """
         Execute all tasks and discard results.
@@ -241,18 +262,45 @@ class Executor:
             # they will be included in the final schedule
             edge_tups.append((Executor.DUMMY_TASK_VALUE, task))
 
-        def _compare_key(task: Union[Task, str]):
-            if task == Executor.DUMMY_TASK_VALUE:
-                return ("", 0)
+        def _compare_key(task: Task):
             return (
                 task.group_label() or "",
                 -task.priority(),
             )
 
+        # Order tasks by a depth-first post-order traversal from the targets,
+        # so that each target's inputs are computed immediately before it
+        # and can be evicted before work on the next target starts. Sorting
+        # the dependencies of each task keeps tasks with matching group
+        # labels together.
+        post_order: Dict[Task, int] = {}
+        visited = set()
+        for target in targets:
+            stack = [(target, False)]
+            while stack:
+                task, expanded = stack.pop()
+                if expanded:
+                    post_order[task] = len(post_order)
+                    continue
+                if task in visited:
+                    continue
+                visited.add(task)
+                stack.append((task, True))
+                for dep in sorted(
+                    self.dependencies[task], key=_compare_key, reverse=True
+                ):
+                    if dep not in visited:
+                        stack.append((dep, False))
+
+        def _schedule_key(task: Union[Task, str]):
+            if task == Executor.DUMMY_TASK_VALUE:
+                return -1
+            return post_order[task]
+
         graph = networkx.DiGraph(edge_tups)
         res = [
             t
-            for t in networkx.lexicographical_topological_sort(graph, key=_compare_key)
+            for t in networkx.lexicographical_topological_sort(graph, key=_schedule_key)
             if t != Executor.DUMMY_TASK_VALUE
         ]
         return res
@@ -17,6 +17,7 @@ import json
 import logging
 import os
 import os.path
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
@@ -107,11 +108,23 @@ class LazyTensorLoader:
     index: ShardedTensorIndex
     current_shard: Optional[TensorLoader]
     lazy_unpickle: bool
-
-    def __init__(self, index: ShardedTensorIndex, lazy_unpickle: bool = True):
+    max_open_shards: int
+
+    def __init__(
+        self,
+        index: ShardedTensorIndex,
+        lazy_unpickle: bool = True,
+        max_open_shards: Optional[int] = None,
+    ):
         self.index = index
         self.current_shard = None
         self.lazy_unpickle = lazy_unpickle
+        if max_open_shards is None:
+            # safetensors and lazily unpickled shards are cheap to keep open,
+            # but a plain torch.load holds the entire shard in memory
+            max_open_shards = 16 if (index.is_safetensors or lazy_unpickle) else 1
+        self.max_open_shards = max_open_shards
+        self._open_shards: "OrderedDict[str, TensorLoader]" = OrderedDict()
 
     def get_tensor(
         self, key: str, device: str = "cpu", aliases: Optional[List[str]] = None
@@ -126,21 +139,32 @@ class LazyTensorLoader:
             if key not in self.index.tensor_paths:
                 raise KeyError(key)
 
-            self.current_shard = None
-            self.current_keys = None
-
             shard_file = self.index.tensor_paths[key]
-            shard_full_path = os.path.join(self.index.base_path, shard_file)
-            logging.debug(f"Opening shard {shard_full_path}")
-            self.current_shard = TensorLoader.get(
-                shard_full_path, use_lazy_unpickle=self.lazy_unpickle, device=device
-            )
+            self.current_shard = self._open_shard(shard_file, device=device)
 
         return self.current_shard.get_tensor(key).to(device)
 
+    def _open_shard(self, shard_file: str, device: str) -> TensorLoader:
+        if shard_file in self._open_shards:
+            self._open_shards.move_to_end(shard_file)
+            return self._open_shards[shard_file]
+
+        # drop least recently used shards before opening a new one
+        self.current_shard = None
+        while self._open_shards and len(self._open_shards) >= self.max_open_shards:
+            self._open_shards.popitem(last=False)
+
+        shard_full_path = os.path.join(self.index.base_path, shard_file)
+        logging.debug(f"Opening shard {shard_full_path}")
+        shard = TensorLoader.get(
+            shard_full_path, use_lazy_unpickle=self.lazy_unpickle, device=device
+        )
+        self._open_shards[shard_file] = shard
+        return shard
+
     def flush(self):
         self.current_shard = None
-        self.current_keys = None
+        self._open_shards.clear()
 
     @classmethod
     def from_disk(
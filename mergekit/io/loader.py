@@ -13,8 +13,11 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program. If not, see http://www.gnu.org/licenses/.
 
+import json
+import mmap
+import struct
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Sequence
+from typing import Any, Dict, Optional, Sequence
 
 import safetensors
 import torch
@@ -41,6 +44,8 @@ class TensorLoader(ABC):
         device: Optional[str] = None,
     ) -> "TensorLoader":
         if shard_path.lower().endswith(".safetensors"):
+            if (device or "cpu") == "cpu":
+                return MmapSafetensorsLoader(shard_path)
             # not a subclass of TensorLoader, but exposes same api
             return safetensors.safe_open(
                 shard_path, framework="pt", device=device or "cpu"
@@ -50,6 +55,90 @@ class TensorLoader(ABC):
         return DumbPytorchLoader(shard_path, device=device)
 
 
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+# dtypes that are not available in every supported version of torch
+SAFETENSORS_DTYPES.update(
+    {
+        name: getattr(torch, torch_name)
+        for name, torch_name in [
+            ("F8_E4M3", "float8_e4m3fn"),
+            ("F8_E5M2", "float8_e5m2"),
+            ("U16", "uint16"),
+            ("U32", "uint32"),
+            ("U64", "uint64"),
+        ]
+        if hasattr(torch, torch_name)
+    }
+)
+
+
+class MmapSafetensorsLoader(TensorLoader):
+    """Zero-copy loader for safetensors files.
+
+    Tensors are returned as views into a private (copy-on-write) memory map of
+    the file, so no data is read until it is used and pages can be shared with
+    the OS page cache. The mapping is released once all tensors referencing it
+    have been freed. Tensors with a dtype missing from SAFETENSORS_DTYPES are
+    read through safetensors instead."""
+
+    path: str
+    header: Dict[str, Any]
+    data_offset: int
+
+    def __init__(self, path: str):
+        self.path = path
+        self._safe_open = None
+        with open(path, "rb") as fd:
+            (header_len,) = struct.unpack("<Q", fd.read(8))
+            self.header = json.loads(fd.read(header_len))
+            self.header.pop("__metadata__", None)
+            self.data_offset = 8 + header_len
+            self._mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    def get_tensor(self, key: str) -> torch.Tensor:
+        info = self.header[key]
+        dtype = SAFETENSORS_DTYPES.get(info["dtype"])
+        if dtype is None:
+            if self._safe_open is None:
+                self._safe_open = safetensors.safe_open(self.path, framework="pt")
+            return self._safe_open.get_tensor(key)
+        start, end = info["data_offsets"]
+        if start == end:
+            return torch.empty(info["shape"], dtype=dtype)
+
+        offset = self.data_offset + start
+        if hasattr(mmap, "MADV_WILLNEED"):
+            # have the OS start reading the tensor's pages in the background,
+            # so that tensors loaded ahead of time (see Executor.prefetch_depth)
+            # are read from disk while other tensors are being merged
+            page_start = offset - offset % mmap.PAGESIZE
+            self._mmap.madvise(
+                mmap.MADV_WILLNEED, page_start, self.data_offset + end - page_start
+            )
+
+        element_size = torch.empty((), dtype=dtype).element_size()
+        return torch.frombuffer(
+            self._mmap,
+            dtype=dtype,
+            count=(end - start) // element_size,
+            offset=offset,
+        ).view(info["shape"])
+
+    def keys(self) -> Sequence[str]:
+        return self.header.keys()
+
+
 class LazyPickleLoader(TensorLoader):
     """Loader for pytorch files using a custom unpickler and vigorous monkeypatching."""
 
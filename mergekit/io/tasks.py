@@ -1,5 +1,6 @@
 import os
 import re
+import threading
 from typing import Dict, Optional, Tuple
 
 import torch
@@ -21,6 +22,11 @@ class LoaderCache:
 
     # singleton instance
     _instance: Optional["LoaderCache"] = None
+    # guards `loaders` so models can be warmed up from multiple threads
+    _lock: threading.Lock = threading.Lock()
+    # merging a LoRA loads the full base model into memory, so only
+    # allow one merge at a time
+    _lora_lock: threading.Lock = threading.Lock()
 
     def __new__(cls) -> "LoaderCache":
         if cls._instance is None:
@@ -28,14 +34,24 @@ class LoaderCache:
         return cls._instance
 
     def get(self, model: ModelReference) -> LazyTensorLoader:
-        if model not in self.loaders:
-            merged = model.merged(
-                cache_dir=self.lora_cache_dir, trust_remote_code=self.trust_remote_code
-            )
-            self.loaders[model] = merged.lazy_loader(
+        with self._lock:
+            loader = self.loaders.get(model)
+        if loader is None:
+            # load outside of the lock so that downloads can overlap
+            if model.lora:
+                with self._lora_lock:
+                    merged = model.merged(
+                        cache_dir=self.lora_cache_dir,
+                        trust_remote_code=self.trust_remote_code,
+                    )
+            else:
+                merged = model
+            loader = merged.lazy_loader(
                 cache_dir=self.hf_cache_dir, lazy_unpickle=self.lazy_unpickle
             )
-        return self.loaders[model]
+            with self._lock:
+                loader = self.loaders.setdefault(model, loader)
+        return loader
 
     def flush_all(self):
         for loader in self.loaders.values():
@@ -143,6 +159,7 @@ class TensorWriterTask(Task[TensorWriter]):
     out_path: str
     max_shard_size: int
     safe_serialization: bool = True
+    async_write: bool = True
 
     def arguments(self) -> Dict[str, Task]:
         return {}
@@ -152,6 +169,7 @@ class TensorWriterTask(Task[TensorWriter]):
             self.out_path,
             max_shard_size=self.max_shard_size,
             safe_serialization=self.safe_serialization,
+            async_write=self.async_write,
         )
 
 
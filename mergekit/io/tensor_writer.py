@@ -16,11 +16,21 @@
 import json
 import logging
 import os
-from typing import Dict
+import queue
+import struct
+import threading
+from typing import Dict, Optional
 
-import safetensors
 import torch
 
+from mergekit.io.loader import SAFETENSORS_DTYPES
+
+SAFETENSORS_DTYPE_NAMES = {dtype: name for name, dtype in SAFETENSORS_DTYPES.items()}
+
+# size of the file buffer used when writing shards - small tensors (norms,
+# biases) are coalesced into a single write instead of one syscall each
+WRITE_BUFFER_SIZE = 16 * 1024 * 1024
+
 
 class TensorWriter:
     out_path: str
@@ -31,24 +41,44 @@ class TensorWriter:
     current_shard_size: int
     total_size: int
     safe_serialization: bool
+    async_write: bool
 
     def __init__(
         self,
         out_path: str,
         max_shard_size: int = 1000 * 1000 * 1000 * 5,
         safe_serialization: bool = True,
+        async_write: bool = True,
     ) -> None:
         os.makedirs(out_path, exist_ok=True)
 
         self.out_path = out_path
         self.max_shard_size = max_shard_size
         self.safe_serialization = safe_serialization
+        self.async_write = async_write
         self.shards_written = 0
         self.weight_map = {}
         self.current_shard = {}
         self.current_shard_size = 0
         self.total_size = 0
 
+        # shards are handed off to a background thread for writing so that
+        # computation of the next tensors can overlap with disk I/O. At most
+        # one shard is in flight, so peak memory is two shards (one being
+        # written and one being filled).
+        self._write_queue: Optional[queue.Queue] = None
+        self._write_thread: Optional[threading.Thread] = None
+        self._write_error: Optional[BaseException] = None
+        if async_write:
+            self._write_queue = queue.Queue(maxsize=1)
+            self._write_thread = threading.Thread(
+                target=self._write_worker,
+                args=(self._write_queue,),
+                name="TensorWriter",
+                daemon=True,
+            )
+            self._write_thread.start()
+
     def save_tensor(self, name: str, tensor: torch.Tensor, clone: bool = False):
         tensor_size = tensor.view(-1).shape[0]
         if (
@@ -77,17 +107,31 @@ class TensorWriter:
             self.weight_map[key] = shard_name
 
         shard_path = os.path.join(self.out_path, shard_name)
-        if self.safe_serialization:
-            self._save_st(shard_path)
+        if self._write_queue is not None:
+            # wait for the previous shard to finish writing before handing
+            # off the next one
+            self._write_queue.join()
+            self._raise_write_error()
+            self._write_queue.put((shard_path, self.current_shard))
         else:
-            torch.save(self.current_shard, shard_path)
+            self._write_shard(shard_path, self.current_shard)
 
         self.current_shard = {}
         self.current_shard_size = 0
         self.shards_written = self.shards_written + 1
 
+    def join(self):
+        """Wait for all pending shard writes to complete."""
+        if self._write_thread is not None:
+            self._write_queue.put(None)
+            self._write_thread.join()
+            self._write_thread = None
+            self._write_queue = None
+        self._raise_write_error()
+
     def finalize(self):
         self.flush_current_shard()
+        self.join()
 
         logging.info("Finalizing shard names")
 
@@ -131,29 +175,65 @@ class TensorWriter:
             return "model", "safetensors"
         return "pytorch_model", "bin"
 
-    def _save_st(self, shard_path: str):
-        def _do_save():
-            safetensors.torch.save_file(
-                self.current_shard,
-                shard_path,
-                metadata={"format": "pt"},
-            )
-
-        try:
-            _do_save()
-        except RuntimeError as e:
-            if (
-                len(e.args) > 0
-                and isinstance(e.args[0], str)
-                and "share memory" in e.args[0]
-            ):
-                logging.warning(
-                    "Your model has duplicated tensors but the --clone-tensors "
-                    "flag is not set."
-                )
-                self.current_shard = {
-                    key: self.current_shard[key].clone() for key in self.current_shard
-                }
-                _do_save()
-            else:
-                raise
+    def _write_worker(self, write_queue: queue.Queue):
+        while True:
+            item = write_queue.get()
+            if item is None:
+                write_queue.task_done()
+                return
+            shard_path, shard = item
+            item = None
+            # after a failure, remaining shards are drained without writing
+            if self._write_error is None:
+                try:
+                    self._write_shard(shard_path, shard)
+                except BaseException as e:
+                    self._write_error = e
+            # release the shard before signalling that the write is done
+            shard = None
+            write_queue.task_done()
+
+    def _raise_write_error(self):
+        if self._write_error is not None:
+            raise RuntimeError("Failed to write shard to disk") from self._write_error
+
+    def _write_shard(self, shard_path: str, shard: Dict[str, torch.Tensor]):
+        if self.safe_serialization:
+            self._save_st(shard_path, shard)
+        else:
+            torch.save(shard, shard_path)
+
+    def _save_st(self, shard_path: str, shard: Dict[str, torch.Tensor]):
+        # Each tensor is serialized on its own rather than handing the shard
+        # to safetensors.torch.save_file, which rejects tensors that share
+        # memory. Repeated layers can then be written without cloning. Data
+        # is written straight from each tensor's memory, with no intermediate
+        # bytes copy.
+        header = {"__metadata__": {"format": "pt"}}
+        tensors = []
+        offset = 0
+        # order by descending element size so every tensor's data starts
+        # at an offset aligned to its dtype
+        for name, tensor in sorted(
+            shard.items(), key=lambda item: (-item[1].element_size(), item[0])
+        ):
+            tensor = tensor.detach().cpu().contiguous()
+            num_bytes = tensor.numel() * tensor.element_size()
+            header[name] = {
+                "dtype": SAFETENSORS_DTYPE_NAMES[tensor.dtype],
+                "shape": list(tensor.shape),
+                "data_offsets": [offset, offset + num_bytes],
+            }
+            tensors.append(tensor)
+            offset += num_bytes
+
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        # pad header so tensor data is 8-byte aligned
+        header_bytes += b" " * (-len(header_bytes) % 8)
+
+        with open(shard_path, "wb", buffering=WRITE_BUFFER_SIZE) as file:
+            file.write(struct.pack("<Q", len(header_bytes)))
+            file.write(header_bytes)
+            for tensor in tensors:
+                if tensor.numel() > 0:
+                    file.write(tensor.view(-1).view(torch.uint8).numpy().data)
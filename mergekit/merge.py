@@ -13,11 +13,13 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program. If not, see http://www.gnu.org/licenses/.
 
+import concurrent.futures
 import logging
 import os
 import shutil
 from typing import Optional
 
+import torch
 import tqdm
 import transformers
 
@@ -40,6 +42,9 @@ def run_merge(
     if options.random_seed is not None:
         transformers.trainer_utils.set_seed(options.random_seed)
 
+    if options.num_threads:
+        torch.set_num_threads(options.num_threads)
+
     if not merge_config.models and not merge_config.slices:
         raise RuntimeError("No output requested")
 
@@ -48,7 +53,7 @@ def run_merge(
         for m in merge_config.referenced_models()
     ]
     if not options.allow_crimes:
-        if not all(a == model_arch_info[0] for a in model_arch_info[1:]):
+        if len(set(model_arch_info)) > 1:
             raise RuntimeError(
                 "Must specify --allow-crimes to attempt to mix different architectures"
             )
@@ -64,15 +69,26 @@ def run_merge(
     )
 
     # warm up loader cache
-    for model in (
-        pbar := tqdm.tqdm(
-            merge_config.referenced_models(),
+    models = merge_config.referenced_models()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(len(models), 8))
+    futures = [pool.submit(loader_cache.get, model) for model in models]
+    try:
+        for future in tqdm.tqdm(
+            concurrent.futures.as_completed(futures),
+            total=len(futures),
             desc="Warmup loader cache",
+            mininterval=0.5,
             disable=options.quiet,
-        )
-    ):
-        loader_cache.get(model)
-    del pbar
+        ):
+            # surface any exceptions raised while loading
+            future.result()
+    except BaseException:
+        # report the error without waiting for the remaining models to load
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        pool.shutdown(wait=False)
 
     logging.info("Planning operations")
     targets = MergePlanner(
@@ -86,6 +102,8 @@ def run_merge(
         tasks=targets,
         math_device="cuda" if options.cuda else "cpu",
         storage_device="cuda" if options.low_cpu_memory else "cpu",
+        # load upcoming tensors in the background while merging the current one
+        prefetch_depth=4,
     )
 
     tokenizer = None
@@ -96,40 +114,49 @@ def run_merge(
     if tokenizer:
         _update_config_vocab(cfg_out, tokenizer)
 
-    logging.info("Saving config")
-    cfg_out.save_pretrained(out_path)
+    # config and tokenizer are written to separate files, so save them
+    # concurrently with each other and with the model card
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        logging.info("Saving config")
+        futures = [pool.submit(cfg_out.save_pretrained, out_path)]
+        if tokenizer:
+            logging.info("Saving tokenizer")
+            futures.append(
+                pool.submit(
+                    tokenizer.save_pretrained, out_path, safe_serialization=True
+                )
+            )
 
-    if options.write_model_card:
-        if not config_source:
-            config_source = merge_config.to_yaml()
+        if options.write_model_card:
+            if not config_source:
+                config_source = merge_config.to_yaml()
 
-        card_md = generate_card(
-            config=merge_config,
-            config_yaml=config_source,
-            name=os.path.basename(out_path),
-        )
-        with open(os.path.join(out_path, "README.md"), "w", encoding="utf-8") as fp:
-            fp.write(card_md)
-
-        with open(
-            os.path.join(out_path, "mergekit_config.yml"), "w", encoding="utf-8"
-        ) as fp:
-            fp.write(config_source)
-
-    if tokenizer is None and options.copy_tokenizer:
-        try:
-            _copy_tokenizer(
-                merge_config, out_path, trust_remote_code=options.trust_remote_code
-            )
-        except Exception as e:
-            logging.error(
-                "Failed to copy tokenizer. The merge was still successful, just copy it from somewhere else.",
-                exc_info=e,
+            card_md = generate_card(
+                config=merge_config,
+                config_yaml=config_source,
+                name=os.path.basename(out_path),
             )
+            with open(os.path.join(out_path, "README.md"), "w", encoding="utf-8") as fp:
+                fp.write(card_md)
+
+            with open(
+                os.path.join(out_path, "mergekit_config.yml"), "w", encoding="utf-8"
+            ) as fp:
+                fp.write(config_source)
+
+        if tokenizer is None and options.copy_tokenizer:
+            try:
+                _copy_tokenizer(
+                    merge_config, out_path, trust_remote_code=options.trust_remote_code
+                )
+            except Exception as e:
+                logging.error(
+                    "Failed to copy tokenizer. The merge was still successful, just copy it from somewhere else.",
+                    exc_info=e,
+                )
 
-    if tokenizer:
-        logging.info("Saving tokenizer")
-        tokenizer.save_pretrained(out_path, safe_serialization=True)
+        for future in futures:
+            future.result()
 
 
 def _copy_tokenizer(
@@ -182,19 +209,7 @@ def _model_out_config(
     if config.dtype:
         res.torch_dtype = config.dtype
 
-    if config.slices:
-        try:
-            num_layers = sum(
-                s.sources[0].layer_range[1] - s.sources[0].layer_range[0]
-                for s in config.slices
-            )
-            setattr(res, arch_info.num_layers_config_key(), num_layers)
-        except Exception as e:
-            logging.warning(
-                "Unable to set number of layers in output config - you may need to manually correct it.",
-                exc_info=e,
-            )
-
+    # the number of layers is set by MergePlanner once slices are resolved
     return res
 
 
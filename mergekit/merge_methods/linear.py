@@ -52,16 +52,21 @@ class LinearMergeTask(Task[torch.Tensor]):
                 f"Tensor size mismatch for {self.parameter_name}, sizes: {list(unique_shapes)}"
             )
 
-        tensors = torch.stack(tensors, dim=0)
-        weights = torch.tensor(weights, dtype=tensors.dtype, device=tensors.device)
-        while len(weights.shape) < len(tensors.shape):
-            weights.unsqueeze_(-1)
-
-        res = (weights * tensors).sum(dim=0)
         if self.normalize:
-            res = res / weights.sum(dim=0)
-
-        return res
+            # fold normalization into the weights rather than making another
+            # pass over the merged tensor
+            total_weight = sum(weights)
+            if abs(total_weight) < 1e-8:
+                total_weight = 1
+            weights = [w / total_weight for w in weights]
+
+        # accumulate in float32 directly from the input tensors, rather than
+        # stacking them or upcasting each one to a full precision copy
+        res = torch.zeros_like(tensors[0], dtype=torch.float32)
+        for tensor, weight in zip(tensors, weights):
+            res.add_(tensor, alpha=weight)
+
+        return res.to(tensors[0].dtype)
 
     def group_label(self) -> Optional[str]:
         return self.gather_tensors.group_label()
@@ -113,54 +113,48 @@ def slerp(
     Returns:
         v2 (np.ndarray): Interpolation vector between v0 and v1
     """
-    is_torch = False
-    if not isinstance(v0, np.ndarray):
-        is_torch = True
-        v0 = v0.detach().cpu().float().numpy()
-    if not isinstance(v1, np.ndarray):
-        is_torch = True
-        v1 = v1.detach().cpu().float().numpy()
-
-    # Copy the vectors to reuse them later
-    v0_copy = np.copy(v0)
-    v1_copy = np.copy(v1)
-
-    # Normalize the vectors to get the directions and angles
-    v0 = normalize(v0, eps)
-    v1 = normalize(v1, eps)
-
-    # Dot product with the normalized vectors (can't use np.dot in W)
-    dot = np.sum(v0 * v1)
-
-    # If absolute value of dot product is almost 1, vectors are ~colinear, so use lerp
-    if np.abs(dot) > DOT_THRESHOLD:
-        res = lerp(t, v0_copy, v1_copy)
-        return maybe_torch(res, is_torch)
+    is_torch = not (isinstance(v0, np.ndarray) and isinstance(v1, np.ndarray))
+    if isinstance(v0, np.ndarray):
+        v0 = torch.from_numpy(v0)
+    if isinstance(v1, np.ndarray):
+        v1 = torch.from_numpy(v1)
+    v0 = v0.detach()
+    if (v0.device.type != "cpu") or v0.dtype == torch.bfloat16:
+        work_dtype = v0.dtype
+    else:
+        # half precision arithmetic is poorly supported on CPU, upcast to float32
+        work_dtype = torch.float32
+    v0 = v0.to(dtype=work_dtype)
+    v1 = v1.detach().to(device=v0.device, dtype=work_dtype)
+    t = torch.as_tensor(t, dtype=torch.float32, device=v0.device)
+
+    # Only the norms are needed to get the angle between the directions, so
+    # the inputs are never normalized in full. Reductions accumulate in
+    # float32 even when the weights themselves are in lower precision.
+    norm_v0 = torch.linalg.vector_norm(v0, dtype=torch.float32)
+    norm_v1 = torch.linalg.vector_norm(v1, dtype=torch.float32)
+    norm_v0 = torch.where(norm_v0 > eps, norm_v0, torch.ones_like(norm_v0))
+    norm_v1 = torch.where(norm_v1 > eps, norm_v1, torch.ones_like(norm_v1))
+    dot = torch.sum(v0 * v1, dtype=torch.float32) / (norm_v0 * norm_v1)
 
     # Calculate initial angle between v0 and v1
-    theta_0 = np.arccos(dot)
-    sin_theta_0 = np.sin(theta_0)
+    theta_0 = torch.arccos(dot.clamp(-1, 1))
+    sin_theta_0 = torch.sin(theta_0)
 
     # Angle at timestep t
     theta_t = theta_0 * t
-    sin_theta_t = np.sin(theta_t)
+    sin_theta_t = torch.sin(theta_t)
 
-    # Finish the slerp algorithm
-    s0 = np.sin(theta_0 - theta_t) / sin_theta_0
-    s1 = sin_theta_t / sin_theta_0
-    res = s0 * v0_copy + s1 * v1_copy
+    # If absolute value of dot product is almost 1, vectors are ~colinear, so
+    # use lerp coefficients instead
+    colinear = dot.abs() > DOT_THRESHOLD
+    s0 = torch.where(colinear, 1 - t, torch.sin(theta_0 - theta_t) / sin_theta_0)
+    s1 = torch.where(colinear, t, sin_theta_t / sin_theta_0)
 
-    return maybe_torch(res, is_torch)
+    # Combine in a single pass over the weights
+    res = v0 * s0.to(work_dtype)
+    res.addcmul_(v1, s1.to(work_dtype))
 
-
-def maybe_torch(v: np.ndarray, is_torch: bool):
     if is_torch:
-        return torch.from_numpy(v)
-    return v
-
-
-def normalize(v: np.ndarray, eps: float):
-    norm_v = np.linalg.norm(v)
-    if norm_v > eps:
-        v = v / norm_v
-    return v
+        return res
+    return res.numpy()
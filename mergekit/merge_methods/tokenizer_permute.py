@@ -26,6 +26,13 @@ from mergekit.merge_methods.slerp import slerp
 from mergekit.tokenizer import BuildTokenizer, TokenizerInfo
 
 
+def _is_identity(permutation: Dict[int, int], num_rows: int) -> bool:
+    """Return True if a permutation maps every row of a tensor to itself."""
+    return len(permutation) == num_rows and all(
+        permutation.get(idx) == idx for idx in range(num_rows)
+    )
+
+
 class TokenizerPermutationMergeTask(Task[torch.Tensor]):
     tokenizer_task: BuildTokenizer
     gather_tensors: GatherTensors
@@ -61,15 +68,20 @@ class TokenizerPermutationMergeTask(Task[torch.Tensor]):
             x = tensors[model]
             p = tokenizer_info.permutations[model]
 
-            xp = torch.zeros((len(p), x.shape[-1]), dtype=x.dtype, device=x.device)
-            mask = torch.zeros((len(p),), dtype=torch.bool, device=x.device)
-            for out_idx in p:
-                in_idx = p[out_idx]
-                if in_idx < 0:
-                    continue
-
-                xp[out_idx, :] = x[in_idx, :]
-                mask[out_idx] = 1
+            if _is_identity(p, x.shape[0]):
+                # vocabulary is unchanged, so every row maps to itself
+                xp = x
+                mask = torch.ones((len(p),), dtype=torch.bool, device=x.device)
+            else:
+                xp = torch.zeros((len(p), x.shape[-1]), dtype=x.dtype, device=x.device)
+                mask = torch.zeros((len(p),), dtype=torch.bool, device=x.device)
+                for out_idx in p:
+                    in_idx = p[out_idx]
+                    if in_idx < 0:
+                        continue
+
+                    xp[out_idx, :] = x[in_idx, :]
+                    mask[out_idx] = 1
 
             expanded.append(xp)
             masks.append(mask)
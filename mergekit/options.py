@@ -40,6 +40,7 @@ class MergeOptions(BaseModel):
     safe_serialization: bool = True
     quiet: bool = False
     read_to_gpu: bool = False
+    num_threads: Optional[int] = None
 
 
 OPTION_HELP = {
@@ -58,6 +59,7 @@ OPTION_HELP = {
     "safe_serialization": "Save output in safetensors. Do this, don't poison the world with more pickled models.",
     "quiet": "Suppress progress bars and other non-essential output",
     "read_to_gpu": "Read model weights directly to GPU",
+    "num_threads": "Number of threads to use for parallel CPU operations",
 }
 
 
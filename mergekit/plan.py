@@ -53,6 +53,7 @@ class MergePlanner:
     _method: MergeMethod
     _tensors: List[Tuple[WeightInfo, Task]]
     _current_layers: int = 0
+    total_layers: int = 0
     _tokenizer_task: Optional[BuildTokenizer] = None
 
     def __init__(
@@ -157,11 +158,17 @@ class MergePlanner:
 
         base_model = cfg_reader.base_model
 
+        # input weights usually share a name, so reuse readers where possible
+        tensor_cfg_readers = {weight.name: cfg_g}
         tensor_params = {}
         for model, weight_in in zip(models, weights_in):
             is_base = model == base_model
             tensor_params[model] = {}
-            cfg_m = cfg_reader.for_tensor(weight_in.name)
+            if weight_in.name not in tensor_cfg_readers:
+                tensor_cfg_readers[weight_in.name] = cfg_reader.for_tensor(
+                    weight_in.name
+                )
+            cfg_m = tensor_cfg_readers[weight_in.name]
             for p in tensor_merge_method.tensor_parameters():
                 tensor_params[model][p.name] = cfg_m.parameter(
                     p.name,
@@ -207,17 +214,20 @@ class MergePlanner:
             for s in sources
         ]
 
+        models = [s.model for s in sources]
+        layer_cfg_reader = cfg_reader.with_t(t)
         for idx, w_o in enumerate(weights_out):
             self.plan_tensor(
                 weight=w_o,
                 weights_in=[weights_in[j][idx] for j in range(len(weights_in))],
-                models=[s.model for s in sources],
-                cfg_reader=cfg_reader.with_t(t),
+                models=models,
+                cfg_reader=layer_cfg_reader,
             )
 
         self._current_layers += 1
 
-    def plan_slice(self, definition: OutputSliceDefinition):
+    def slice_length(self, definition: OutputSliceDefinition) -> int:
+        """Return the number of layers in an output slice."""
         slice_lengths = [
             s.layer_range[1] - s.layer_range[0] for s in definition.sources
         ]
@@ -225,8 +235,9 @@ class MergePlanner:
             raise RuntimeError(
                 "All inputs to a slice must contain the same number of layers"
             )
-        num_layers = slice_lengths[0]
+        return slice_lengths[0]
 
+    def plan_slice(self, definition: OutputSliceDefinition, num_layers: int):
         cfg_reader = ConfigReader(config=self.config, slice_out=definition, t=0)
         for idx in range(num_layers):
             # compute t for interpolated gradients
@@ -250,6 +261,8 @@ class MergePlanner:
             out_path=out_path,
             max_shard_size=self.options.out_shard_size,
             safe_serialization=self.options.safe_serialization,
+            # writing in the background keeps an extra shard in memory
+            async_write=not self.options.low_cpu_memory,
         )
         save_tasks = []
         for weight, tensor_task in self._tensors:
@@ -281,6 +294,20 @@ class MergePlanner:
         self.normalize_config()
         self._tensors = []
 
+        slice_lengths = [self.slice_length(s) for s in self.config.slices]
+        self.total_layers = sum(slice_lengths)
+        try:
+            setattr(
+                self.out_model_config,
+                self.arch_info.num_layers_config_key(),
+                self.total_layers,
+            )
+        except Exception as e:
+            logging.warning(
+                "Unable to set number of layers in output config - you may need to manually correct it.",
+                exc_info=e,
+            )
+
         for weight_info in self.arch_info.pre_weights(config=self.out_model_config):
             self.plan_tensor(
                 weight_info,
@@ -293,8 +320,8 @@ class MergePlanner:
                 ).for_out_slice(self.config.slices[0]),
             )
 
-        for out_slice in self.config.slices:
-            self.plan_slice(out_slice)
+        for out_slice, num_layers in zip(self.config.slices, slice_lengths):
+            self.plan_slice(out_slice, num_layers=num_layers)
 
         for weight_info in self.arch_info.post_weights(config=self.out_model_config):
             self.plan_tensor(
@@ -1,4 +1,6 @@
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 
 import networkx
 import pytest
@@ -172,6 +174,18 @@ class TestExecutorGroupLabel:
             group1_indices[-1] > group2_index
         ), "Task with the same group label but later dependency was not scheduled after different group label"
 
+    def test_targets_completed_depth_first(self):
+        # inputs of the first target should not stay alive while
+        # the second target is computed
+        x1 = create_mock_task("x1", group_label="a")
+        x2 = create_mock_task("x2", group_label="c")
+        x = create_mock_task("x", dependencies={"x1": x1, "x2": x2}, group_label="c")
+        y1 = create_mock_task("y1", group_label="b")
+        y = create_mock_task("y", dependencies={"y1": y1}, group_label="b")
+
+        schedule = Executor([x, y]).schedule
+        assert schedule == [x1, x2, x, y1, y]
+
 
 class TestExecutorSingleExecution:
     def test_single_execution_per_task(self):
@@ -190,6 +204,73 @@ class TestExecutorSingleExecution:
         ), "Shared dependency should be executed exactly once"
 
 
+class TestExecutorPrefetch:
+    def test_prefetch_results(self):
+        EXECUTION_COUNTS.clear()
+
+        leaves = [create_mock_task(f"leaf{i}", result=i) for i in range(4)]
+        mids = [
+            create_mock_task(f"mid{i}", result=i * 10, dependencies={"leaf": leaf})
+            for i, leaf in enumerate(leaves)
+        ]
+        root = create_mock_task(
+            "root",
+            result=100,
+            dependencies={f"mid{i}": mid for i, mid in enumerate(mids)},
+        )
+
+        results = list(Executor(mids + [root], prefetch_depth=3).run())
+        assert dict(results) == {
+            **{mid: i * 10 for i, mid in enumerate(mids)},
+            root: 100,
+        }
+        for task in leaves + mids + [root]:
+            assert EXECUTION_COUNTS[task] == 1, "Each task should execute once"
+
+
+TASK_INTERVALS: Dict[str, Tuple[threading.Thread, float, float]] = {}
+
+
+class SleepTask(Task):
+    name: str
+    dependencies: ImmutableMap[str, Task]
+
+    def arguments(self):
+        return self.dependencies
+
+    def execute(self, **kwargs):
+        start = time.perf_counter()
+        time.sleep(0.1)
+        TASK_INTERVALS[self.name] = (
+            threading.current_thread(),
+            start,
+            time.perf_counter(),
+        )
+        return self.name
+
+
+class TestExecutorPrefetchOverlap:
+    def test_prefetch_overlaps_execution(self):
+        TASK_INTERVALS.clear()
+
+        loads = [
+            SleepTask(name=f"load{i}", dependencies=ImmutableMap(data={}))
+            for i in range(2)
+        ]
+        merges = [
+            SleepTask(name=f"merge{i}", dependencies=ImmutableMap(data={"x": load}))
+            for i, load in enumerate(loads)
+        ]
+        list(Executor(merges, prefetch_depth=2).run(quiet=True))
+
+        # the second load runs in the background while the first merge runs
+        load_thread, load_start, load_end = TASK_INTERVALS["load1"]
+        merge_thread, merge_start, merge_end = TASK_INTERVALS["merge0"]
+        assert load_thread is not merge_thread
+        assert merge_thread is threading.main_thread()
+        assert load_start < merge_end and merge_start < load_end
+
+
 class CircularTask(Task):
     def arguments(self) -> Dict[str, Task]:
         return {"its_a_me": self}
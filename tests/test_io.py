@@ -1,9 +1,16 @@
+import mmap
 import os
 import tempfile
+import time
 
+import pytest
+import safetensors.torch
 import torch
 
 from mergekit.io import TensorWriter
+from mergekit.io import loader as loader_module
+from mergekit.io.lazy_tensor_loader import LazyTensorLoader, ShardedTensorIndex
+from mergekit.io.loader import MmapSafetensorsLoader
 
 
 class TestTensorWriter:
@@ -31,7 +38,228 @@ class TestTensorWriter:
             jim = torch.randn(4)
             writer.save_tensor("jim", jim)
             writer.save_tensor("jimbo", jim)
+            # shared tensors are written as-is, without cloning
+            assert writer.current_shard["jimbo"] is jim
             writer.finalize()
 
             assert os.path.exists(os.path.join(d, "model-00001-of-00001.safetensors"))
             assert os.path.exists(os.path.join(d, "model.safetensors.index.json"))
+            loaded = safetensors.torch.load_file(
+                os.path.join(d, "model-00001-of-00001.safetensors")
+            )
+            assert torch.equal(loaded["jim"], jim)
+            assert torch.equal(loaded["jimbo"], jim)
+
+    def test_async_write_one_shard_in_flight(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = TensorWriter(d, max_shard_size=8, safe_serialization=True)
+            write_shard = writer._write_shard
+            pending = []
+
+            def _slow_write_shard(path, shard):
+                time.sleep(0.05)
+                # shards handed off to the writer but not yet written
+                pending.append(writer.shards_written - len(pending))
+                write_shard(path, shard)
+
+            writer._write_shard = _slow_write_shard
+            for idx in range(5):
+                writer.save_tensor(f"tensor_{idx}", torch.randn(8))
+            writer.finalize()
+
+            assert len(pending) == 5
+            assert max(pending) == 1
+
+    def test_multiple_shards(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = TensorWriter(d, max_shard_size=8, safe_serialization=True)
+            for idx in range(5):
+                writer.save_tensor(f"tensor_{idx}", torch.randn(8))
+            writer.finalize()
+
+            for idx in range(5):
+                assert os.path.exists(
+                    os.path.join(d, f"model-{idx+1:05d}-of-00005.safetensors")
+                )
+            assert os.path.exists(os.path.join(d, "model.safetensors.index.json"))
+
+    def test_safetensors_roundtrip(self):
+        tensors = {
+            "float": torch.randn(3, 5),
+            "bfloat": torch.randn(7).to(torch.bfloat16),
+            "half_view": torch.randn(4, 4).to(torch.float16)[:, 1],
+            "long": torch.arange(4),
+            "scalar": torch.tensor(1.5),
+            "empty": torch.zeros(0, 2),
+        }
+        with tempfile.TemporaryDirectory() as d:
+            writer = TensorWriter(d, safe_serialization=True)
+            for name, tensor in tensors.items():
+                writer.save_tensor(name, tensor)
+            writer.finalize()
+
+            loaded = safetensors.torch.load_file(
+                os.path.join(d, "model-00001-of-00001.safetensors")
+            )
+            assert set(loaded.keys()) == set(tensors.keys())
+            for name, tensor in tensors.items():
+                assert loaded[name].dtype == tensor.dtype
+                assert torch.equal(loaded[name], tensor)
+
+    def test_safetensors_alignment(self):
+        tensors = {
+            "a_bfloat": torch.randn(3).to(torch.bfloat16),
+            "b_bool": torch.tensor([True, False, True]),
+            "c_float": torch.randn(1000),
+            "d_long": torch.arange(5),
+        }
+        with tempfile.TemporaryDirectory() as d:
+            writer = TensorWriter(d, safe_serialization=True)
+            for name, tensor in tensors.items():
+                writer.save_tensor(name, tensor)
+            writer.finalize()
+
+            loader = MmapSafetensorsLoader(
+                os.path.join(d, "model-00001-of-00001.safetensors")
+            )
+            for name, tensor in tensors.items():
+                start, _ = loader.header[name]["data_offsets"]
+                assert start % tensor.element_size() == 0
+                assert torch.equal(loader.get_tensor(name), tensor)
+
+
+class TestMmapSafetensorsLoader:
+    def test_matches_safetensors(self):
+        tensors = {
+            "float": torch.randn(3, 5),
+            "bfloat": torch.randn(7).to(torch.bfloat16),
+            "long": torch.arange(4),
+            "empty": torch.zeros(0, 2),
+        }
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "model.safetensors")
+            safetensors.torch.save_file(tensors, path)
+
+            loader = MmapSafetensorsLoader(path)
+            assert set(loader.keys()) == set(tensors.keys())
+            for key, value in tensors.items():
+                loaded = loader.get_tensor(key)
+                assert loaded.dtype == value.dtype
+                assert loaded.shape == value.shape
+                assert torch.equal(loaded, value)
+
+    @pytest.mark.parametrize(
+        "dtype_name,st_name",
+        [
+            ("float8_e4m3fn", "F8_E4M3"),
+            ("float8_e5m2", "F8_E5M2"),
+            ("uint16", "U16"),
+            ("uint32", "U32"),
+            ("uint64", "U64"),
+        ],
+    )
+    def test_extended_dtypes(self, dtype_name: str, st_name: str):
+        if not hasattr(torch, dtype_name):
+            pytest.skip(f"torch.{dtype_name} not available")
+        dtype = getattr(torch, dtype_name)
+        tensor = torch.arange(16, dtype=torch.uint8).view(dtype)
+        with tempfile.TemporaryDirectory() as d:
+            writer = TensorWriter(d, safe_serialization=True)
+            writer.save_tensor("x", tensor)
+            writer.finalize()
+
+            path = os.path.join(d, "model-00001-of-00001.safetensors")
+            loader = MmapSafetensorsLoader(path)
+            assert loader.header["x"]["dtype"] == st_name
+            loaded = loader.get_tensor("x")
+            assert loaded.dtype == dtype
+            assert torch.equal(loaded.view(torch.uint8), tensor.view(torch.uint8))
+
+    @pytest.mark.skipif(
+        not hasattr(mmap, "MADV_WILLNEED"), reason="madvise not supported"
+    )
+    def test_reads_ahead(self, monkeypatch):
+        advised = []
+
+        class RecordingMmap(mmap.mmap):
+            def madvise(self, option, start=0, length=None):
+                advised.append((option, start, length))
+                return super().madvise(option, start, length)
+
+        monkeypatch.setattr(mmap, "mmap", RecordingMmap)
+        tensors = {"a": torch.randn(3000), "b": torch.randn(5)}
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "model.safetensors")
+            safetensors.torch.save_file(tensors, path)
+
+            loader = MmapSafetensorsLoader(path)
+            for key in ["a", "b"]:
+                advised.clear()
+                assert torch.equal(loader.get_tensor(key), tensors[key])
+
+                # the tensor's pages are requested when the tensor is loaded
+                start, end = loader.header[key]["data_offsets"]
+                (option, advise_start, advise_length) = advised[0]
+                assert option == mmap.MADV_WILLNEED
+                assert advise_start % mmap.PAGESIZE == 0
+                assert advise_start <= loader.data_offset + start
+                assert advise_start + advise_length == loader.data_offset + end
+
+    def test_unknown_dtype_fallback(self, monkeypatch):
+        tensors = {"half": torch.randn(3).to(torch.float16), "float": torch.randn(2)}
+        monkeypatch.delitem(loader_module.SAFETENSORS_DTYPES, "F16")
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "model.safetensors")
+            safetensors.torch.save_file(tensors, path)
+
+            loader = MmapSafetensorsLoader(path)
+            for key, value in tensors.items():
+                loaded = loader.get_tensor(key)
+                assert loaded.dtype == value.dtype
+                assert torch.equal(loaded, value)
+
+
+class TestLazyTensorLoader:
+    def test_open_shard_lru(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = TensorWriter(d, max_shard_size=4, safe_serialization=True)
+            for name in ["a", "b", "c"]:
+                writer.save_tensor(name, torch.randn(4))
+            writer.finalize()
+
+            index = ShardedTensorIndex.from_disk(d)
+            assert len(index.shards) == 3
+            shard_a, shard_b, shard_c = (
+                index.tensor_paths[name] for name in ["a", "b", "c"]
+            )
+            assert LazyTensorLoader(index).max_open_shards == 16
+
+            loader = LazyTensorLoader(index, max_open_shards=2)
+            loader.get_tensor("a")
+            loader.get_tensor("b")
+            opened_a = loader._open_shards[shard_a]
+
+            # switching back to an open shard reuses it
+            loader.get_tensor("a")
+            assert loader._open_shards[shard_a] is opened_a
+            assert list(loader._open_shards) == [shard_b, shard_a]
+
+            # opening a third shard evicts the least recently used one
+            loader.get_tensor("c")
+            assert list(loader._open_shards) == [shard_a, shard_c]
+            assert loader._open_shards[shard_a] is opened_a
+
+            loader.flush()
+            assert not loader._open_shards
+            assert loader.current_shard is None
+
+    def test_max_open_shards_default(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = TensorWriter(d, safe_serialization=False)
+            writer.save_tensor("a", torch.randn(4))
+            writer.finalize()
+
+            index = ShardedTensorIndex.from_disk(d)
+            # fully loaded pickled shards are only kept open one at a time
+            assert LazyTensorLoader(index, lazy_unpickle=False).max_open_shards == 1
+            assert LazyTensorLoader(index, lazy_unpickle=True).max_open_shards == 16
@@ -0,0 +1,160 @@
+from typing import Dict, List
+
+import numpy as np
+import pytest
+import torch
+
+from mergekit.common import ImmutableMap, ModelReference
+from mergekit.io.tasks import GatherTensors
+from mergekit.merge_methods.linear import LinearMergeTask
+from mergekit.merge_methods.slerp import slerp
+
+
+def reference_slerp(t, v0, v1, DOT_THRESHOLD=0.9995, eps=1e-8):
+    # numpy implementation of slerp from previous versions of mergekit
+    is_torch = False
+    if not isinstance(v0, np.ndarray):
+        is_torch = True
+        v0 = v0.detach().cpu().float().numpy()
+    if not isinstance(v1, np.ndarray):
+        is_torch = True
+        v1 = v1.detach().cpu().float().numpy()
+
+    def _normalize(v):
+        norm_v = np.linalg.norm(v)
+        if norm_v > eps:
+            v = v / norm_v
+        return v
+
+    dot = np.sum(_normalize(v0) * _normalize(v1))
+    if np.abs(dot) > DOT_THRESHOLD:
+        res = (1 - t) * v0 + t * v1
+    else:
+        theta_0 = np.arccos(dot)
+        sin_theta_0 = np.sin(theta_0)
+        theta_t = theta_0 * t
+        s0 = np.sin(theta_0 - theta_t) / sin_theta_0
+        s1 = np.sin(theta_t) / sin_theta_0
+        res = s0 * v0 + s1 * v1
+
+    if is_torch:
+        return torch.from_numpy(res)
+    return res
+
+
+class TestSlerp:
+    @pytest.mark.parametrize("t", [0.0, 0.3, 0.5, 1.0])
+    def test_matches_reference(self, t: float):
+        v0 = torch.randn(64, 32)
+        v1 = torch.randn(64, 32)
+        res = slerp(t, v0, v1)
+        assert isinstance(res, torch.Tensor)
+        assert res.dtype == torch.float32
+        assert torch.allclose(res, reference_slerp(t, v0, v1), atol=1e-5)
+
+    def test_colinear(self):
+        v0 = torch.randn(128)
+        v1 = 2.5 * v0 + 1e-4 * torch.randn(128)
+        res = slerp(0.3, v0, v1)
+        assert torch.allclose(res, 0.7 * v0 + 0.3 * v1, atol=1e-5)
+        assert torch.allclose(res, reference_slerp(0.3, v0, v1), atol=1e-5)
+
+    def test_antiparallel(self):
+        v0 = torch.randn(128)
+        v1 = -3 * v0
+        res = slerp(0.4, v0, v1)
+        assert torch.isfinite(res).all()
+        assert torch.allclose(res, 0.6 * v0 + 0.4 * v1, atol=1e-5)
+        assert torch.allclose(res, reference_slerp(0.4, v0, v1), atol=1e-5)
+
+    def test_zero_norm(self):
+        v0 = torch.zeros(16, 8)
+        v1 = torch.randn(16, 8)
+        for t in [0.25, 0.75]:
+            res = slerp(t, v0, v1)
+            assert torch.isfinite(res).all()
+            assert torch.allclose(res, reference_slerp(t, v0, v1), atol=1e-5)
+
+            res = slerp(t, v1, v0)
+            assert torch.isfinite(res).all()
+            assert torch.allclose(res, reference_slerp(t, v1, v0), atol=1e-5)
+
+    def test_numpy(self):
+        v0 = np.random.randn(32, 16).astype(np.float32)
+        v1 = np.random.randn(32, 16).astype(np.float32)
+        res = slerp(0.6, v0, v1)
+        assert isinstance(res, np.ndarray)
+        assert np.allclose(res, reference_slerp(0.6, v0, v1), atol=1e-5)
+
+    def test_bfloat16(self):
+        v0 = torch.randn(256, 64)
+        v1 = torch.randn(256, 64)
+        expected = slerp(0.4, v0, v1)
+
+        res = slerp(0.4, v0.to(torch.bfloat16), v1.to(torch.bfloat16))
+        assert res.dtype == torch.bfloat16
+        assert torch.allclose(res.float(), expected, atol=2e-2, rtol=2e-2)
+
+
+def _linear_merge(
+    tensors: List[torch.Tensor], weights: List[float], normalize: bool
+) -> torch.Tensor:
+    models = [ModelReference.parse(f"model_{idx}") for idx in range(len(tensors))]
+    task = LinearMergeTask(
+        gather_tensors=GatherTensors(weight_info=ImmutableMap(data={})),
+        tensor_parameters=ImmutableMap(
+            data={
+                model: ImmutableMap(data={"weight": weight})
+                for model, weight in zip(models, weights)
+            }
+        ),
+        normalize=normalize,
+        parameter_name="model.layers.0.mlp.up_proj.weight",
+    )
+    inputs: Dict[ModelReference, torch.Tensor] = dict(zip(models, tensors))
+    return task.execute(tensors=inputs)
+
+
+def reference_linear(
+    tensors: List[torch.Tensor], weights: List[float], normalize: bool
+) -> torch.Tensor:
+    # linear merge as implemented in previous versions of mergekit
+    tensors = torch.stack(tensors, dim=0)
+    weights = torch.tensor(weights, dtype=tensors.dtype, device=tensors.device)
+    while len(weights.shape) < len(tensors.shape):
+        weights.unsqueeze_(-1)
+
+    res = (weights * tensors).sum(dim=0)
+    if normalize:
+        res = res / weights.sum(dim=0)
+    return res
+
+
+class TestLinear:
+    @pytest.mark.parametrize("normalize", [True, False])
+    def test_matches_reference(self, normalize: bool):
+        tensors = [torch.randn(16, 8) for _ in range(3)]
+        weights = [0.5, 0.3, 0.7]
+        res = _linear_merge(tensors, weights, normalize=normalize)
+        assert res.dtype == torch.float32
+        assert torch.allclose(
+            res, reference_linear(tensors, weights, normalize=normalize), atol=1e-5
+        )
+
+    def test_bfloat16(self):
+        tensors = [torch.randn(16, 8) for _ in range(3)]
+        weights = [0.5, 0.3, 0.7]
+        expected = reference_linear(tensors, weights, normalize=True)
+
+        res = _linear_merge(
+            [t.to(torch.bfloat16) for t in tensors], weights, normalize=True
+        )
+        assert res.dtype == torch.bfloat16
+        assert torch.allclose(res.float(), expected, atol=2e-2, rtol=2e-2)
+
+    def test_zero_total_weight(self):
+        tensors = [torch.randn(16, 8) for _ in range(2)]
+        weights = [1.0, -1.0]
+        res = _linear_merge(tensors, weights, normalize=True)
+        assert torch.isfinite(res).all()
+        assert torch.allclose(res, tensors[0] - tensors[1])
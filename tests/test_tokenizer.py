@@ -5,10 +5,15 @@ from typing import List, Optional, Union
 
 import pytest
 import tokenizers
+import torch
 from common import make_picollama, run_and_check_merge
 from transformers import LlamaTokenizerFast, PreTrainedTokenizerBase
 
+from mergekit.common import ImmutableMap, ModelReference
 from mergekit.config import InputModelDefinition, MergeConfiguration, ParameterSetting
+from mergekit.io.tasks import GatherTensors
+from mergekit.merge_methods import tokenizer_permute
+from mergekit.tokenizer import BuildTokenizer, TokenizerInfo
 
 
 @pytest.fixture(scope="session")
@@ -187,3 +192,36 @@ class TestTokenizerMerges:
             parameters=parameters,
         )
         return config
+
+
+class TestTokenizerPermutationMerge:
+    @pytest.mark.parametrize("use_slerp", [False, True])
+    def test_identity_fast_path(self, monkeypatch, use_slerp: bool):
+        models = [ModelReference.parse("model_a"), ModelReference.parse("model_b")]
+        tensors = {model: torch.randn(64, 8) for model in models}
+        task = tokenizer_permute.TokenizerPermutationMergeTask(
+            tokenizer_task=BuildTokenizer(
+                base_model=models[0],
+                referenced_models=tuple(models),
+                tokenizer_source="base",
+            ),
+            gather_tensors=GatherTensors(weight_info=ImmutableMap(data={})),
+            base_model=models[0],
+            use_slerp=use_slerp,
+            slerp_t=0.3 if use_slerp else None,
+            tensor_parameters=ImmutableMap(
+                data={
+                    models[0]: ImmutableMap(data={"weight": 1.0}),
+                    models[1]: ImmutableMap(data={"weight": 0.5}),
+                }
+            ),
+        )
+        tokenizer_info = TokenizerInfo(
+            tokenizer=make_tokenizer(vocab_size=64, added_tokens=[]),
+            permutations={model: {idx: idx for idx in range(64)} for model in models},
+        )
+
+        fast = task.execute(tokenizer_info=tokenizer_info, tensors=dict(tensors))
+        monkeypatch.setattr(tokenizer_permute, "_is_identity", lambda *_: False)
+        slow = task.execute(tokenizer_info=tokenizer_info, tensors=dict(tensors))
+        assert torch.equal(fast, slow)